@@ -1,4 +1,8 @@
-class ColorProfiles:
+import sys
+from enum import Enum
+
+
+class ColorProfiles(Enum):
     """This class contains a list of colors that can be used to modify console output."""
     HEADER = '\033[95m'
     OKBLUE = '\033[94m'
@@ -7,10 +11,18 @@ class ColorProfiles:
     OKRED = '\033[91m'
     OKYELLOW = '\033[93m'
     OKMAGENTA = '\033[45m'
-    OKCYAN = '\033[46m'
+    OKCYANBG = '\033[46m'
     OKWHITE = '\033[47m'
     WARNING = '\033[93m'
     FAIL = '\033[91m'
     ENDC = '\033[0m'
     BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
\ No newline at end of file
+    UNDERLINE = '\033[4m'
+
+    @classmethod
+    def wrap(cls, msg, color, stream=None):
+        """Wraps msg in the given color, or returns it unchanged when the stream it is written to (stdout by default) is not a terminal (e.g. Streamlit or CI)."""
+        stream = sys.stdout if stream is None else stream
+        if not stream.isatty():
+            return str(msg)
+        return f"{color.value}{msg}{cls.ENDC.value}"
\ No newline at end of file
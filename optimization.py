@@ -1,13 +1,57 @@
 import pandas as pd
+import numpy as np
 from gurobipy import Model, GRB, quicksum
 import time
+import math
 import folium
 from streamlit_folium import st_folium
 import streamlit as st
 import io
+import os
 import sys
+from numba import njit
 from colors import ColorProfiles as clr
 
+
+@njit(cache=True)
+def _normalize_kernel(start_hour, start_minute, end_hour, end_minute):
+    start = start_hour + start_minute / 60
+    end = end_hour + end_minute / 60
+    for i in range(end.size):
+        if end[i] < start[i]:
+            end[i] += 24  # normalize end_hour for the next day
+    return start, end
+
+
+def _hour_minute(column):
+    """
+    Returns the hours and minutes of a column of datetimes, or of datetime.time and datetime values as read from Excel.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(column):
+        # Excel sheets can mix time-only and date-time cells; parsing their string form handles both
+        column = pd.to_datetime(column.astype(str), format='mixed')
+    return column.dt.hour.to_numpy(np.float64), column.dt.minute.to_numpy(np.float64)
+
+
+def normalized_shift_times(source_df, destination_df):
+    """
+    Returns copies of the source and destination DataFrames with the shift times converted to hours, so that end times
+    after midnight are handled correctly, and the planned end of loading parsed as datetimes.
+
+    Args:
+        source_df (pd.DataFrame): Consignment source information.
+        destination_df (pd.DataFrame): Destination facility information.
+    """
+    source_df = source_df.copy()
+    destination_df = destination_df.copy()
+    start_hour, start_minute = _hour_minute(destination_df['Start of shift'])
+    end_hour, end_minute = _hour_minute(destination_df['End of lay-on'])
+    start, end = _normalize_kernel(start_hour, start_minute, end_hour, end_minute)
+    destination_df[['Start of shift', 'End of lay-on']] = np.column_stack([start, end])
+    source_df['planned_end_of_loading'] = pd.to_datetime(source_df['planned_end_of_loading'])
+    return source_df, destination_df
+
+
 class DHL_Optimization:
     def __init__(self):
         """
@@ -24,13 +68,24 @@ class DHL_Optimization:
         self.routes_list = None
         self.consignment_list = None
         self.valid_combinations = None
-        self.trucks = range(300)
+        self.fleet_size = 300
+        self.max_days = 6
+        self.days = range(1, self.max_days + 1)
+        self.earliest_day = {}
+        self.trucks = range(self.fleet_size)
         self.X = {}
         self.Z = {}
         self.T = {}
         self.ArrivalDay = {}
         self.ArrivalTime = {}
         self.ArrivalDayBinary = {}
+        self.W = {}
+        self.W_quantity = {}
+        self.release_time_by_k = {}
+        self.qty_by_k = {}
+        self.travel_by_ij = {}
+        self.shift_by_j = {}
+        self.sorting_capacity_by_j = {}
 
     def read_data(self, source_path, destination_path, trucking_path):
         """
@@ -41,23 +96,37 @@ class DHL_Optimization:
             destination_path (str): Path to the destination facility information Excel file.
             trucking_path (str): Path to the trucking information Excel file.
         """
-        self.source_df = pd.read_excel(source_path, sheet_name="PZA")
-        self.destination_df = pd.read_excel(destination_path, sheet_name="PZE")
-        self.trucking_df = pd.read_excel(trucking_path, sheet_name="Truck")
-
-    def normalize(self, row):
-        start_hour = row['Start of shift'].hour + row['Start of shift'].minute / 60
-        end_hour = row['End of lay-on'].hour + row['End of lay-on'].minute / 60
-        if end_hour < start_hour:
-            end_hour += 24  # normalize end_hour for the next day
-        return pd.Series([start_hour, end_hour])
+        self.source_df = pd.read_excel(source_path, sheet_name="PZA", engine='calamine')
+        self.destination_df = pd.read_excel(destination_path, sheet_name="PZE", engine='calamine')
+        self.trucking_df = pd.read_excel(trucking_path, sheet_name="Truck", engine='calamine')
 
     def normalize_shift_times(self):
         """
         Normalizes the shift times in the destination DataFrame to ensure that end times after midnight are handled correctly.
         """       
-        self.destination_df[['Start of shift', 'End of lay-on']] = self.destination_df.apply(self.normalize, axis=1)
-        self.source_df['planned_end_of_loading'] = pd.to_datetime(self.source_df['planned_end_of_loading'])
+        self.source_df, self.destination_df = normalized_shift_times(self.source_df, self.destination_df)
+
+    def build_lookups(self):
+        """
+        Builds dictionary lookups from the DataFrames so that the constraints do not have to filter the DataFrames for every consignment and truck.
+        """
+        self.release_time_by_k = dict(zip(self.source_df['id'], self.source_df['planned_end_of_loading'].dt.hour))
+        self.qty_by_k = dict(zip(self.source_df['id'], self.source_df['Consignment quantity']))
+        self.travel_by_ij = self.trucking_df.drop_duplicates(['Origin_ID', 'Destination_ID']).set_index(['Origin_ID', 'Destination_ID'])['OSRM_time [sek]'].to_dict()
+        self.shift_by_j = self.destination_df.drop_duplicates('Destination_ID').set_index('Destination_ID')[['Start of shift', 'End of lay-on', 'Sorting capacity']].to_dict('index')
+
+    def earliest_arrival_day(self, i, j, release_time):
+        """
+        Returns the first day on which a truck released at release_time can reach j from i before the end of lay-on.
+
+        Args:
+            i (str): Origin ID.
+            j (str): Destination ID.
+            release_time (float): Hour at which the consignments are released.
+        """
+        travel_time = self.travel_by_ij[(i, j)] / 3600
+        end_shift = self.shift_by_j[j]['End of lay-on']
+        return max(1, math.ceil((release_time + travel_time - end_shift) / 24) + 1)
 
     def initialize_model(self, selected_sources, selected_destination):
         """
@@ -66,31 +135,52 @@ class DHL_Optimization:
         self.source_list = selected_sources
         self.destination_list = [selected_destination]
         self.routes_list = [(i, j) for i in self.source_list for j in self.destination_list if i != j]
-        self.consignment_list = [
-            x for (i, j) in self.routes_list
-            for x in self.source_df[(self.source_df['Origin_ID'] == i) & (self.source_df['Destination_ID'] == j)]['id'].values
-        ]
-        
-        self.valid_combinations = [
-            (i, j, k) for (i, j) in self.routes_list 
-            for k in self.consignment_list if k in self.source_df[(self.source_df['Origin_ID'] == i) & (self.source_df['Destination_ID'] == j)]['id'].values
-        ]
-
-        self.trucks = range(300)
-
-        for (i, j, k, l) in [(i, j, k, l) for (i, j, k) in self.valid_combinations for l in self.trucks]:
-            self.X[(i, j, k, l)] = self.model.addVar(vtype=GRB.BINARY, name=f"X_{i}_{j}_{k}_{l}")
-
-        for l in self.trucks:
-            self.Z[l] = self.model.addVar(vtype=GRB.BINARY, name=f"Z_{l}")
-            self.T[l] = self.model.addVar(lb=0, vtype=GRB.CONTINUOUS, name=f"T_{l}")
-            self.ArrivalTime[l] = self.model.addVar(lb=0, ub=24, vtype=GRB.CONTINUOUS, name=f"ArrivalTime_{l}")
-            for d in range(1, 7):  # Maximum number of days to consider
-                self.ArrivalDayBinary[(l, d)] = self.model.addVar(vtype=GRB.BINARY, name=f"ArrivalDayBinary_{l}_{d}")
+
+        # Select all consignments on the selected routes in a single pass over the source DataFrame
+        mask = (
+            self.source_df['Origin_ID'].isin(self.source_list)
+            & self.source_df['Destination_ID'].isin(self.destination_list)
+            & (self.source_df['Origin_ID'] != self.source_df['Destination_ID'])
+        )
+        sub = self.source_df.loc[mask, ['Origin_ID', 'Destination_ID', 'id']]
+        self.valid_combinations = list(sub.itertuples(index=False, name=None))
+        self.consignment_list = sub['id'].unique().tolist()
+
+        # Consignments on routes with different travel times, or whose quantities exceed the daily sorting capacity
+        # together, cannot share a truck, so in the worst case every consignment needs its own truck
+        self.trucks = range(min(self.fleet_size, len(self.valid_combinations)))
+
+        # Days before the earliest possible arrival of any consignment can never be assigned
+        self.build_lookups()
+        self.earliest_day = {
+            (i, j, k): self.earliest_arrival_day(i, j, self.release_time_by_k[k])
+            for (i, j, k) in self.valid_combinations
+        }
+        self.days = range(min(self.earliest_day.values(), default=1), self.max_days + 1)
+
+        # Variables are created in bulk; Gurobi suffixes the names with the keys
+        self.X = self.model.addVars(
+            [(i, j, k, l) for (i, j, k) in self.valid_combinations for l in self.trucks],
+            vtype=GRB.BINARY, name="X"
+        )
+        self.Z = self.model.addVars(self.trucks, vtype=GRB.BINARY, name="Z")
+        self.T = self.model.addVars(self.trucks, lb=0, vtype=GRB.CONTINUOUS, name="T")
+        # Trucks must arrive within the operational hours of the selected destination (part of constraint 3)
+        shift = self.shift_by_j[selected_destination]
+        self.ArrivalTime = self.model.addVars(
+            self.trucks, lb=shift['Start of shift'], ub=shift['End of lay-on'], vtype=GRB.CONTINUOUS, name="ArrivalTime"
+        )
+        self.ArrivalDayBinary = self.model.addVars(self.trucks, self.days, vtype=GRB.BINARY, name="ArrivalDayBinary")
+        # W[i, j, k, l, d] = X[i, j, k, l] AND ArrivalDayBinary[l, d], only for days consignment k can arrive on
+        self.W = self.model.addVars(
+            [(i, j, k, l, d) for (i, j, k) in self.valid_combinations for l in self.trucks for d in self.days if d >= self.earliest_day[(i, j, k)]],
+            vtype=GRB.BINARY, name="W"
+        )
+        self.W_quantity = {key: self.qty_by_k[key[2]] for key in self.W.keys()}
                 
         # Objective function: Minimize the total arrival time
-        
-        self.model.setObjective(quicksum(self.Z[l]* quicksum(d * self.ArrivalDayBinary[(l, d)] for d in range(1, 7)) for l in self.trucks), GRB.MINIMIZE)
+        # An arrival day is only assigned to used trucks (constraint 6), so no product with Z is needed
+        self.model.setObjective(quicksum(d * self.ArrivalDayBinary[(l, d)] for l in self.trucks for d in self.days), GRB.MINIMIZE)
 
     def add_constraints(self):
         """
@@ -100,88 +190,178 @@ class DHL_Optimization:
         print("Adding constraints to the model...")
         st.write("Adding constraints to the model...")
         
+        timings = []
         time_saved = time.time()
 
         # 1. Each truck can carry at most 2 consignments
-        for l in self.trucks:
-            self.model.addConstr(quicksum(self.X[(i, j, k, l)] for (i, j, k) in self.valid_combinations) <= 2 * self.Z[l])
+        self.model.addConstrs(
+            (self.X.sum('*', '*', '*', l) <= 2 * self.Z[l] for l in self.trucks),
+            name="TruckCapacity"
+        )
         
-        print(f"1st Constraint took {clr.OKYELLOW}{time.time() - time_saved}{clr.ENDC} seconds.")
-        st.write(f"1st Constraint took {time.time() - time_saved:.2f} seconds.")
+        timings.append(('1st', time.time() - time_saved))
         time_saved = time.time()
 
 
         # 2. Consignment can only be released after the latest release time of the consignments
-        for (i, j, k) in self.valid_combinations:
-            release_time = self.source_df[self.source_df['id'] == k]['planned_end_of_loading'].dt.hour.values[0]
-            for l in self.trucks:
-                self.model.addConstr(self.T[l] >= release_time * self.X[(i, j, k, l)])
+        self.model.addConstrs(
+            (self.T[l] >= self.release_time_by_k[k] * self.X[(i, j, k, l)] for (i, j, k) in self.valid_combinations for l in self.trucks),
+            name="ReleaseTime"
+        )
         
-        print(f"2nd Constraint took {clr.OKYELLOW}{time.time() - time_saved}{clr.ENDC} seconds.")
-        st.write(f"2nd Constraint took {time.time() - time_saved:.2f} seconds.")
+        timings.append(('2nd', time.time() - time_saved))
         time_saved = time.time()
         
         # 3: Truck must arrive at the destination within the operational hours
-        for (i, j, k) in self.valid_combinations:
-            start_shift = self.destination_df[self.destination_df['Destination_ID'] == j]['Start of shift'].values[0]
-            end_shift = self.destination_df[self.destination_df['Destination_ID'] == j]['End of lay-on'].values[0]
-            travel_time = self.trucking_df[(self.trucking_df['Origin_ID'] == i) & (self.trucking_df['Destination_ID'] == j)]['OSRM_time [sek]'].values[0] / 3600
-            for l in self.trucks:
-                self.ArrivalTime[(l)] = (self.T[l] + travel_time * self.X[(i, j, k, l)] + 24 * quicksum((d-1)*self.ArrivalDayBinary[(l, d)] for d in range(1, 7))) - 24 * self.model.addVar(vtype=GRB.INTEGER, name=f"multiplier_{i}_{j}_{k}_{l}")
-                self.model.addConstr(self.ArrivalTime[(l)] >= start_shift)
-                self.model.addConstr(self.ArrivalTime[(l)] <= end_shift)
+        # The arrival time is the time of day on the arrival day of the truck carrying the consignment;
+        # the operational hours themselves are the bounds of ArrivalTime
+        self.model.addConstrs(
+            ((self.X[(i, j, k, l)] == 1) >> (
+                self.T[l] + self.travel_by_ij[(i, j)] / 3600 - 24 * quicksum((d - 1) * self.ArrivalDayBinary[(l, d)] for d in self.days) == self.ArrivalTime[l]
+            ) for (i, j, k) in self.valid_combinations for l in self.trucks),
+            name="ArrivalTimeDefinition"
+        )
         
-        print(f"3rd Constraint took {clr.OKYELLOW}{time.time() - time_saved}{clr.ENDC} seconds.")
-        st.write(f"3rd Constraint took {time.time() - time_saved:.2f} seconds.")
+        timings.append(('3rd', time.time() - time_saved))
         time_saved = time.time()
         
         # 4. Each consignment must be assigned to exactly one truck
-        for (i, j, k) in self.valid_combinations:
-            self.model.addConstr(quicksum(self.X[(i, j, k, l)]*self.Z[(l)] for l in self.trucks if (i, j, k) in self.valid_combinations) == 1)
+        self.model.addConstrs(
+            (self.X.sum(i, j, k, '*') == 1 for (i, j, k) in self.valid_combinations),
+            name="ConsignmentAssignment"
+        )
         
-        print(f"4th Constraint took {clr.OKYELLOW}{time.time() - time_saved}{clr.ENDC} seconds.")
-        st.write(f"4th Constraint took {time.time() - time_saved:.2f} seconds.")
+        timings.append(('4th', time.time() - time_saved))
         time_saved = time.time()
         
         # 5. Sorting capacity constraint for each truck arriving at a package center
+        # W linearizes the product of X and ArrivalDayBinary so that the capacity rows are linear in W.
+        # A truck has at most one arrival day (constraint 6), so splitting X over the days of W and bounding
+        # W by the arrival day is exact and needs fewer rows than the full McCormick envelope
+        self.model.addConstrs((self.W.sum(i, j, k, l, '*') == self.X[(i, j, k, l)] for (i, j, k, l) in self.X.keys()), name="WX")
+        self.model.addConstrs((self.W[(i, j, k, l, d)] <= self.ArrivalDayBinary[(l, d)] for (i, j, k, l, d) in self.W.keys()), name="WArrivalDay")
         for j in self.destination_list:
-            working_hours = self.destination_df[self.destination_df['Destination_ID'] == j]['End of lay-on'].values[0] - self.destination_df[self.destination_df['Destination_ID'] == j]['Start of shift'].values[0]
-            sorting_capacity_per_day =  working_hours/2*self.destination_df[self.destination_df['Destination_ID'] == j]['Sorting capacity'].values[0]
-            for d in range(1, 7):
-                self.model.addConstr(
-                    quicksum(self.X[(i, j, k, l)] * self.source_df[self.source_df['id'] == k]['Consignment quantity'].values[0] * self.ArrivalDayBinary[(l, d)]
-                            for i in self.source_list if j != i
-                            for k in self.consignment_list
-                            for l in self.trucks
-                            if (i, j, k) in self.valid_combinations) <= sorting_capacity_per_day,
-                    name=f"SortingCapacity_{j}_{d}"
-                )
+            working_hours = self.shift_by_j[j]['End of lay-on'] - self.shift_by_j[j]['Start of shift']
+            self.sorting_capacity_by_j[j] = working_hours/2*self.shift_by_j[j]['Sorting capacity']
+        sorting_capacity = self.model.addConstrs(
+            (self.W.prod(self.W_quantity, '*', j, '*', '*', d) <= self.sorting_capacity_by_j[j] for j in self.destination_list for d in self.days),
+            name="SortingCapacity"
+        )
+        # Most capacity rows are slack, so Gurobi keeps them in its lazy pool until a solution violates them
+        for constr in sorting_capacity.values():
+            constr.Lazy = 1
         
-        print(f"5th Constraint took {clr.OKYELLOW}{time.time() - time_saved}{clr.ENDC} seconds.")
-        st.write(f"5th Constraint took {time.time() - time_saved:.2f} seconds.")
+        timings.append(('5th', time.time() - time_saved))
         time_saved = time.time()
         
         # 6. Assigning arrival day to each used truck            
-        for l in self.trucks:
-            self.model.addConstr(
-                quicksum(self.ArrivalDayBinary[(l, d)] * self.Z[l] for d in range(1, 7)) == 1,
-                name = f'Assigning Arrival Day to each used truck'
-                )
+        self.model.addConstrs(
+            (self.ArrivalDayBinary.sum(l, '*') == self.Z[l] for l in self.trucks),
+            name="ArrivalDay"
+        )
             
-        print(f"6th Constraint took {clr.OKYELLOW}{time.time() - time_saved}{clr.ENDC} seconds.")
-        st.write(f"6th Constraint took {time.time() - time_saved:.2f} seconds.")
+        timings.append(('6th', time.time() - time_saved))
+        time_saved = time.time()
+
+        # 7. Symmetry breaking: identical trucks are used in index order
+        self.model.addConstrs((self.Z[l] >= self.Z[l + 1] for l in self.trucks[:-1]), name="Symmetry")
+
+        timings.append(('7th', time.time() - time_saved))
+
+        # Report all timings at once instead of one Streamlit message per constraint
+        st.table(pd.DataFrame(timings, columns=['Constraint', 'Seconds']))
+        total = clr.wrap(f"{sum(seconds for _, seconds in timings):.2f}", clr.OKYELLOW)
+        print(f"Constraints added in {total} seconds ({', '.join(f'{name}: {seconds:.2f}s' for name, seconds in timings)}).")
                 
-    def solve(self):
+    def set_warm_start(self):
+        """
+        Sets a greedy start solution: the consignments of each route are sorted by release time and packed two per truck,
+        arriving on the earliest feasible day on which the destination still has sorting capacity for them.
+        Consignments that do not fit are left for Gurobi to complete.
+        """
+        consignments_by_route = {}
+        for (i, j, k) in sorted(self.valid_combinations, key=lambda c: self.release_time_by_k[c[2]]):
+            consignments_by_route.setdefault((i, j), []).append(k)
+
+        truck_of = {}
+        day_of = {}
+        departure_of = {}
+        arrival_time_of = {}
+        incoming_quantity = {}
+        l = 0
+        for (i, j), consignments in consignments_by_route.items():
+            travel_time = self.travel_by_ij[(i, j)] / 3600
+            start_shift = self.shift_by_j[j]['Start of shift']
+            for n in range(0, len(consignments), 2):
+                pair = consignments[n:n + 2]
+                release_time = max(self.release_time_by_k[k] for k in pair)
+                quantity = sum(self.qty_by_k[k] for k in pair)
+                earliest_day = self.earliest_arrival_day(i, j, release_time)
+                d = next(
+                    (d for d in self.days
+                     if d >= earliest_day and incoming_quantity.get((j, d), 0) + quantity <= self.sorting_capacity_by_j[j]),
+                    None
+                )
+                if l >= len(self.trucks) or d is None:
+                    continue
+                incoming_quantity[(j, d)] = incoming_quantity.get((j, d), 0) + quantity
+                # Wait at the origin if the truck would otherwise arrive before the start of shift
+                departure = max(release_time, start_shift + 24 * (d - 1) - travel_time)
+                for k in pair:
+                    truck_of[(i, j, k)] = l
+                day_of[l] = d
+                departure_of[l] = departure
+                arrival_time_of[l] = departure + travel_time - 24 * (d - 1)
+                l += 1
+
+        if not truck_of:
+            return
+
+        # Unused trucks are only fixed to zero when the greedy assigned every consignment
+        complete = len(truck_of) == len(set(self.valid_combinations))
+        trucks = self.trucks if complete else list(day_of)
+
+        x_keys = [key for key in self.X.keys() if key[:3] in truck_of]
+        self.model.setAttr('Start', [self.X[key] for key in x_keys], [int(truck_of[key[:3]] == key[3]) for key in x_keys])
+        w_keys = [key for key in self.W.keys() if key[:3] in truck_of]
+        self.model.setAttr(
+            'Start', [self.W[key] for key in w_keys],
+            [int(truck_of[key[:3]] == key[3] and day_of[key[3]] == key[4]) for key in w_keys]
+        )
+        self.model.setAttr('Start', [self.Z[l] for l in trucks], [int(l in day_of) for l in trucks])
+        day_keys = [(l, d) for l in trucks for d in self.days]
+        self.model.setAttr(
+            'Start', [self.ArrivalDayBinary[key] for key in day_keys],
+            [int(day_of.get(key[0]) == key[1]) for key in day_keys]
+        )
+        self.model.setAttr('Start', [self.T[l] for l in day_of], [departure_of[l] for l in day_of])
+        self.model.setAttr('Start', [self.ArrivalTime[l] for l in day_of], [arrival_time_of[l] for l in day_of])
+
+    def solve(self, param_file=None):
         """
 
         Solves the optimization model and prints the solution.
 
+        Args:
+            param_file (str, optional): Path to a Gurobi parameter file (e.g. produced by grbtune) that overrides the default parameters.
+
         """
         
         print("Solving the optimization problem...")
         start_time = time.time()
         
         self.model.setParam('TimeLimit', 5*60)
+        self.model.setParam('Symmetry', 2)
+        # Finding a feasible assignment is the hard part of this model, so favour feasibility over the bound
+        self.model.setParam('MIPFocus', 1)
+        self.model.setParam('Heuristics', 0.2)
+        self.model.setParam('Presolve', 2)
+        self.model.setParam('Cuts', 2)
+        self.model.setParam('MIPGap', 1e-3)
+        if param_file is not None:
+            self.model.read(param_file)
+
+        self.set_warm_start()
 
         # Capture the output of model.optimize()
         old_stdout = sys.stdout
@@ -197,80 +377,71 @@ class DHL_Optimization:
         st.write("Optimization Output:")  
         st.text(output)
         
-        if self.model.status in [GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.SUBOPTIMAL]:
+        if self.model.status in [GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.SUBOPTIMAL] and self.model.SolCount > 0:
+            # Fetch all solution values in one call each instead of reading .X per variable
+            x_values = self.model.getAttr('X', self.X) if self.X else {}
+            day_values = self.model.getAttr('X', self.ArrivalDayBinary) if self.ArrivalDayBinary else {}
+            departure_values = self.model.getAttr('X', self.T) if self.T else {}
             data = []
-            k_set = set()
-            for (i, j, k, l) in self.X.keys():
-                if (self.Z[l].X == 1 ) and (self.X[i,j,k,l].X == 1):
-                    start_shift = self.destination_df[self.destination_df['Destination_ID'] == j]['Start of shift'].values[0]
-                    end_shift = self.destination_df[self.destination_df['Destination_ID'] == j]['End of lay-on'].values[0]
-                    travel_time = self.trucking_df[(self.trucking_df['Origin_ID'] == i) & (self.trucking_df['Destination_ID'] == j)]['OSRM_time [sek]'].values[0] / 3600
-                    arrival = quicksum(d*self.ArrivalDayBinary[(l, d)].X for d in range(1, 7))
+            for (i, j, k, l), value in x_values.items():
+                if value > 0.5:
                     data.append({
                         'Origin(PZA)': i,
                         'Destination (PZE)': j,
                         'Consignment ID': k,
                         'Truck Id': l,
-                        'Departure time': self.T[l].X,
-                        'Arrival Day': arrival,
-                        "Destination Start Shift": start_shift,
-                        "Destination End Shift": end_shift,
-                        "Travel Time": travel_time
+                        'Departure time': departure_values[l],
+                        'Arrival Day': sum(d * day_values[(l, d)] for d in self.days),
+                        "Destination Start Shift": self.shift_by_j[j]['Start of shift'],
+                        "Destination End Shift": self.shift_by_j[j]['End of lay-on'],
+                        "Travel Time": self.travel_by_ij[(i, j)] / 3600
                     })
             df_out = pd.DataFrame(data)
-            df_out.to_csv("output/output.csv")
+            os.makedirs("output", exist_ok=True)
+            df_out.to_csv("output/output.csv", chunksize=10000)
+            st.dataframe(df_out)
 
         else:
             print("No optimal solution found.")
         
         print(f"Optimization completed in {time.time() - start_time} seconds.")
-        st.dataframe(df_out) 
 
     def show_map(self,selected_sources,selected_destination):
-        start_loc = (
-        self.destination_df[self.destination_df['Destination_ID'] == selected_sources[0]]['PZ_Latitude'].values[0],
-        self.destination_df[self.destination_df['Destination_ID'] == selected_sources[0]]['PZ_Longitude'].values[0]
-        )
+        loc_idx = self.destination_df.drop_duplicates('Destination_ID').set_index('Destination_ID')[['PZ_Latitude', 'PZ_Longitude', 'PZ_Sorting_location']]
+        dist_idx = self.trucking_df.drop_duplicates(['Origin_ID', 'Destination_ID']).set_index(['Origin_ID', 'Destination_ID'])['OSRM_distance [m]']
+
+        start_loc = tuple(loc_idx.loc[selected_sources[0], ['PZ_Latitude', 'PZ_Longitude']])
         map_pze = folium.Map(location=start_loc, zoom_start=13)
 
         routes_list = [(i, selected_destination) for i in selected_sources if i != selected_destination]
 
         for start, end in routes_list:
+            start_lat, start_lon, start_name = loc_idx.loc[start]
+            end_lat, end_lon, end_name = loc_idx.loc[end]
+
             # Marker for the start location
             start_marker = folium.Marker(
-                location=(
-                    self.destination_df[self.destination_df['Destination_ID'] == start]['PZ_Latitude'].values[0],
-                    self.destination_df[self.destination_df['Destination_ID'] == start]['PZ_Longitude'].values[0]
-                ),
-                tooltip=self.destination_df[self.destination_df['Destination_ID'] == start]['PZ_Sorting_location'].values[0]
+                location=(start_lat, start_lon),
+                tooltip=start_name
             )
 
             # Marker for the end location
             end_marker = folium.Marker(
-                location=(
-                    self.destination_df[self.destination_df['Destination_ID'] == end]['PZ_Latitude'].values[0],
-                    self.destination_df[self.destination_df['Destination_ID'] == end]['PZ_Longitude'].values[0]
-                ),
-                tooltip=self.destination_df[self.destination_df['Destination_ID'] == end]['PZ_Sorting_location'].values[0]
+                location=(end_lat, end_lon),
+                tooltip=end_name
             )
 
             # Get the distance between the start and end locations
-            distance = self.trucking_df[(self.trucking_df['Origin_ID'] == start) & (self.trucking_df['Destination_ID'] == end)]['OSRM_distance [m]'].values[0]
+            distance = dist_idx.loc[(start, end)]
 
             # Line for the route segment connecting start to end
             line = folium.PolyLine(
                 locations=[
-                    (
-                        self.destination_df[self.destination_df['Destination_ID'] == start]['PZ_Latitude'].values[0],
-                        self.destination_df[self.destination_df['Destination_ID'] == start]['PZ_Longitude'].values[0]
-                    ),
-                    (
-                        self.destination_df[self.destination_df['Destination_ID'] == end]['PZ_Latitude'].values[0],
-                        self.destination_df[self.destination_df['Destination_ID'] == end]['PZ_Longitude'].values[0]
-                    )
+                    (start_lat, start_lon),
+                    (end_lat, end_lon)
                 ],
-                tooltip=f"<b>From</b>: {self.destination_df[self.destination_df['Destination_ID'] == start]['PZ_Sorting_location'].values[0]}<br>"
-                        f"<b>To</b>: {self.destination_df[self.destination_df['Destination_ID'] == end]['PZ_Sorting_location'].values[0]}<br>"
+                tooltip=f"<b>From</b>: {start_name}<br>"
+                        f"<b>To</b>: {end_name}<br>"
                         f"<b>Distance</b>: {distance} m"
             )
 
@@ -1,8 +1,42 @@
 import streamlit as st
-from optimization import DHL_Optimization
+from optimization import DHL_Optimization, normalized_shift_times
 from optimization_preprocess import preprocess_destination_file, preprocess_source_file, preprocess_trucking_file
 import pandas as pd
 
+@st.cache_data
+def load_source(source_file, default_source_path):
+    if source_file and source_file.name == "2024-04-25_OR Praktikum_RWTH Aachen_WBeh_Aufträge.xlsx":
+        source_df, source_success = preprocess_source_file(source_file)
+        if source_success:
+            return source_df
+    return pd.read_excel(default_source_path, engine='calamine')
+
+@st.cache_data
+def load_destination(destination_file, default_destination_path):
+    if destination_file and destination_file.name == "2024-04-25_OR Praktikum_RWTH Aachen_Inputs.xlsx":
+        destination_df, destination_success = preprocess_destination_file(destination_file)
+        if destination_success:
+            return destination_df
+    return pd.read_excel(default_destination_path, engine='calamine')
+
+@st.cache_data
+def load_trucking(trucking_file, default_trucking_path):
+    if trucking_file and trucking_file.name == "2024-04-25_OSRM_Truck_Distanzen+Fahrtzeiten_PZ_x_PZ.xlsx":
+        trucking_df, trucking_success = preprocess_trucking_file(trucking_file)
+        if trucking_success:
+            return trucking_df
+    trucking_df = pd.read_excel(default_trucking_path, engine='calamine')
+    try:
+        trucking_df.drop(['Unnamed: 12','Note: OSRM time = pure driving time without breaks, …'], axis=1, inplace=True)
+    except Exception:
+        pass
+    return trucking_df
+
+@st.cache_data
+def normalize_data(source_df, destination_df):
+    # Normalize once per input instead of on every rerun of the script
+    return normalized_shift_times(source_df, destination_df)
+
 def main():
     st.title("Dashboard: Optimizing Package Center Deliveries")
     st.header("Select Nodes")
@@ -16,30 +50,10 @@ def main():
     destination_file = st.file_uploader("Upload destination data", type="xlsx")
     trucking_file = st.file_uploader("Upload trucking data", type="xlsx")
 
-    if source_file and source_file.name == "2024-04-25_OR Praktikum_RWTH Aachen_WBeh_Aufträge.xlsx":
-        source_df, source_success = preprocess_source_file(source_file)
-        if not source_success:
-            source_df = pd.read_excel(default_source_path)
-    else:
-        source_df = pd.read_excel(default_source_path)
-
-    if destination_file and destination_file.name == "2024-04-25_OR Praktikum_RWTH Aachen_Inputs.xlsx":
-        destination_df, destination_success = preprocess_destination_file(destination_file)
-        if not destination_success:
-            destination_df = pd.read_excel(default_destination_path)
-    else:
-        destination_df = pd.read_excel(default_destination_path)
-
-    if trucking_file and trucking_file.name == "2024-04-25_OSRM_Truck_Distanzen+Fahrtzeiten_PZ_x_PZ.xlsx":
-        trucking_df, trucking_success = preprocess_trucking_file(trucking_file)
-        if not trucking_success:
-            trucking_df = pd.read_excel(default_trucking_path)
-    else:
-        trucking_df = pd.read_excel(default_trucking_path)
-        try:
-            trucking_df.drop(['Unnamed: 12','Note: OSRM time = pure driving time without breaks, …'], axis=1, inplace=True)
-        except Exception:
-            pass
+    source_df = load_source(source_file, default_source_path)
+    destination_df = load_destination(destination_file, default_destination_path)
+    trucking_df = load_trucking(trucking_file, default_trucking_path)
+    source_df, destination_df = normalize_data(source_df, destination_df)
 
     # Initialize the Class
     optimizer = DHL_Optimization()
@@ -49,8 +63,6 @@ def main():
     optimizer.source_df = source_df
     optimizer.trucking_df = trucking_df
 
-    optimizer.normalize_shift_times()
-
     source_nodes = list(optimizer.trucking_df['Origin_ID'].unique())
     destination_nodes = list(optimizer.trucking_df['Destination_ID'].unique())
 
@@ -16,8 +16,15 @@ def check_and_map_columns(df, required_columns, column_mapping):
         df = df.rename(columns=column_mapping)
         return df, True
 
+# Function to read only the required columns
+def read_required_columns(file_path, required_columns, **kwargs):
+    try:
+        return pd.read_excel(file_path, engine='calamine', usecols=required_columns, **kwargs)
+    except ValueError as e:
+        st.error(f"Could not read the required columns: {e}. Using default file.")
+        return None
+
 def preprocess_destination_file(file_path):
-    df = pd.read_excel(file_path, header=1, usecols=lambda x: 'Unnamed' not in x).dropna(axis='rows')
     required_columns = [
         'PZA_GNR', 'PZ_Sortierstandort', 'PZ_Name', 'Schichtbeginn',
         'Auflegeende (=Sortierschluss/ PZE Sorter Cutoff)', 'Sortierleistung [Sdg je h]', 
@@ -33,10 +40,12 @@ def preprocess_destination_file(file_path):
         'PZ_Latitude': 'PZ_Latitude',
         'PZ_Longitude': 'PZ_Longitude'
     }
-    return check_and_map_columns(df, required_columns, column_mapping)
+    df = read_required_columns(file_path, required_columns, header=1, dtype={'PZA_GNR': str})
+    if df is None:
+        return None, False
+    return check_and_map_columns(df.dropna(axis='rows'), required_columns, column_mapping)
 
 def preprocess_source_file(file_path):
-    df = pd.read_excel(file_path)
     required_columns = [
         'quelle_agnr', 'senke_agnr', 'geplantes_beladeende',
         'Sendungsmenge', 'id'
@@ -48,10 +57,12 @@ def preprocess_source_file(file_path):
         'Sendungsmenge': 'Consignment quantity',
         'id': 'id'
     }
+    df = read_required_columns(file_path, required_columns, dtype={'quelle_agnr': str, 'senke_agnr': str})
+    if df is None:
+        return None, False
     return check_and_map_columns(df, required_columns, column_mapping)
 
 def preprocess_trucking_file(file_path):
-    df = pd.read_excel(file_path)
     required_columns = [
         'Nr', 'Origin_ID', 'Destination_ID',
         'OSRM_distance [m]', 'OSRM_time [sek]'
@@ -63,4 +74,7 @@ def preprocess_trucking_file(file_path):
         'OSRM_distance [m]': 'OSRM_distance [m]',
         'OSRM_time [sek]': 'OSRM_time [sek]'
     }
+    df = read_required_columns(file_path, required_columns, dtype={'Origin_ID': str, 'Destination_ID': str})
+    if df is None:
+        return None, False
     return check_and_map_columns(df, required_columns, column_mapping)
\ No newline at end of file
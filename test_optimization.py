@@ -1,44 +1,70 @@
+import datetime
 import pytest
 import numpy as np
 import pandas as pd
 from gurobipy import Model, GRB
-from optimization import DHL_Optimization
+from optimization import DHL_Optimization, _hour_minute
 
-# Dummy data for testing
+# Dummy data for testing: three consignments from two origins to PZE1. PZE1 sorts 6 h * 15 = 90 per day,
+# so the 120 consignments cannot all arrive on the same day. PZE2's shift ends after midnight.
 dummy_source_data = pd.DataFrame({
-    'id': [7791592, 7791596],
-    'Origin_ID': ['01.1.1.PZ', '15.1.1.PZ'],
-    'Destination_ID': ['50.1.1.PZ', '44.1.1.PZ'],
-    'planned_end_of_loading': np.array(['2024-07-04T08:00:00', '2024-07-04T09:00:00'],dtype='datetime64'),
-    'Consignment quantity': [921, 1085]
+    'id': [7791592, 7791596, 7791601],
+    'Origin_ID': ['PZA1', 'PZA1', 'PZA2'],
+    'Destination_ID': ['PZE1', 'PZE1', 'PZE1'],
+    'planned_end_of_loading': np.array(['2024-07-04T08:00:00', '2024-07-04T09:00:00', '2024-07-04T10:00:00'],dtype='datetime64'),
+    'Consignment quantity': [30, 40, 50]
 })
 
 dummy_destination_data = pd.DataFrame({
     'Destination_ID': ['PZE1', 'PZE2'],
-    'Start of shift': np.array(['2024-07-04T07:00:00', '2024-07-04T07:00:00'],dtype='datetime64'),
-    'End of lay-on': np.array(['2024-07-04T19:00:00', '2024-07-04T19:00:00'], dtype='datetime64'),
-    'Sorting capacity': [20, 25]
+    'Start of shift': np.array(['2024-07-04T07:00:00', '2024-07-04T22:00:00'],dtype='datetime64'),
+    'End of lay-on': np.array(['2024-07-04T19:00:00', '2024-07-05T06:00:00'], dtype='datetime64'),
+    'Sorting capacity': [15, 25]
 })
 
 dummy_trucking_data = pd.DataFrame({
     'Origin_ID': ['PZA1', 'PZA1', 'PZA2', 'PZA2'],
     'Destination_ID': ['PZE1', 'PZE2', 'PZE1', 'PZE2'],
-    'OSRM_time [sek]': [3600, 7200, 3600, 7200]
+    'OSRM_time [sek]': [3600, 7200, 5400, 7200]
 })
 
-@pytest.fixture
-def optimizer():
+def build_optimizer(fleet_size=None):
+    """
+    Builds an initialized optimizer from copies of the dummy data, so the module-level DataFrames are never mutated.
+    """
     optimizer = DHL_Optimization()
-    dummy_destination_data['Start of shift'] = pd.to_datetime(dummy_destination_data['Start of shift'])
-    dummy_destination_data['End of lay-on'] = pd.to_datetime(dummy_destination_data['End of lay-on'])
-    optimizer.source_df = dummy_source_data
-    optimizer.destination_df = dummy_destination_data
-    optimizer.trucking_df = dummy_trucking_data
+    if fleet_size is not None:
+        optimizer.fleet_size = fleet_size
+    destination_data = dummy_destination_data.copy()
+    destination_data['Start of shift'] = pd.to_datetime(destination_data['Start of shift'])
+    destination_data['End of lay-on'] = pd.to_datetime(destination_data['End of lay-on'])
+    optimizer.source_df = dummy_source_data.copy()
+    optimizer.destination_df = destination_data
+    optimizer.trucking_df = dummy_trucking_data.copy()
     optimizer.normalize_shift_times()
     optimizer.initialize_model(
         selected_sources=dummy_source_data['Origin_ID'].unique().tolist(),
         selected_destination=dummy_destination_data['Destination_ID'].iloc[0]
     )
+    # Indexed views of the test data so that the assertions do not filter the DataFrames
+    optimizer._source_by_id = optimizer.source_df.set_index('id')
+    optimizer._dest_by_id = optimizer.destination_df.set_index('Destination_ID')
+    optimizer._trucking_by_od = optimizer.trucking_df.set_index(['Origin_ID', 'Destination_ID'])
+    return optimizer
+
+@pytest.fixture
+def optimizer():
+    # Function scoped: tests using it re-initialize the model or add constraints to it
+    return build_optimizer()
+
+@pytest.fixture(scope='session')
+def solved_optimizer():
+    """
+    Optimizer with constraints added and solved once, shared by all tests that only inspect the solution.
+    """
+    optimizer = build_optimizer()
+    optimizer.add_constraints()
+    optimizer.solve()
     return optimizer
 
 def test_initialize_model(optimizer):
@@ -54,6 +80,18 @@ def test_initialize_model(optimizer):
     assert len(optimizer.routes_list) > 0
     assert len(optimizer.consignment_list) >= 0
 
+def test_hour_minute_excel_times():
+    """
+    Test that shift times read from Excel as datetime.time values, possibly mixed with datetimes, are split into hours and minutes.
+    """
+    hours, minutes = _hour_minute(pd.Series([datetime.time(22, 0), datetime.time(6, 30)]))
+    assert hours.tolist() == [22, 6]
+    assert minutes.tolist() == [0, 30]
+
+    hours, minutes = _hour_minute(pd.Series([datetime.time(7, 0), pd.Timestamp('2024-07-04 19:15:00')], dtype=object))
+    assert hours.tolist() == [7, 19]
+    assert minutes.tolist() == [0, 15]
+
 def test_add_constraints(optimizer):
     """
     Test the addition of constraints to the model.
@@ -61,100 +99,194 @@ def test_add_constraints(optimizer):
     optimizer.add_constraints()
     assert optimizer.model is not None
 
-def test_optimal_solution(optimizer):
+def test_optimal_solution(solved_optimizer):
     """
     Test if the model finds an optimal solution with dummy data.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
     assert optimizer.model.status == GRB.Status.OPTIMAL
 
-def test_truck_capacity_constraint(optimizer):
+def test_truck_capacity_constraint(solved_optimizer):
     """
     Test the constraint that each truck can carry at most 2 consignments.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
 
     if optimizer.model.status == GRB.Status.OPTIMAL:
         for l in optimizer.trucks:
             consignment_sum = sum(optimizer.X[(i, j, k, l)].X for (i, j, k) in optimizer.valid_combinations if optimizer.X[(i, j, k, l)].X > 0)
             assert consignment_sum <= 2
         
-def test_release_time_constraint(optimizer):
+def test_release_time_constraint(solved_optimizer):
     """
     Test the constraint that consignment can only be released after the latest release time of the consignments.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
 
     if optimizer.model.status == GRB.Status.OPTIMAL:
         for (i, j, k) in optimizer.valid_combinations:
-            release_time = optimizer.source_df[optimizer.source_df['id'] == k]['planned_end_of_loading'].dt.hour.values[0]
+            release_time = optimizer._source_by_id.loc[k, 'planned_end_of_loading'].hour
             for l in optimizer.trucks:
                 if optimizer.X[(i, j, k, l)].X > 0:
                     assert optimizer.T[l].X >= release_time
 
-def test_operational_hours_constraint(optimizer):
+def test_operational_hours_constraint(solved_optimizer):
     """
     Test the constraint that trucks must arrive at the destination within operational hours.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
 
     if optimizer.model.status == GRB.Status.OPTIMAL:
         for (i, j, k) in optimizer.valid_combinations:
-            start_shift = optimizer.destination_df[optimizer.destination_df['Destination_ID'] == j]['Start of shift'].values[0]
-            end_shift = optimizer.destination_df[optimizer.destination_df['Destination_ID'] == j]['End of lay-on'].values[0]
-            travel_time = optimizer.trucking_df[(optimizer.trucking_df['Origin_ID'] == i) & (optimizer.trucking_df['Destination_ID'] == j)]['OSRM_time [sek]'].values[0] / 3600
+            start_shift = optimizer._dest_by_id.loc[j, 'Start of shift']
+            end_shift = optimizer._dest_by_id.loc[j, 'End of lay-on']
+            travel_time = optimizer._trucking_by_od.loc[(i, j), 'OSRM_time [sek]'] / 3600
             for l in optimizer.trucks:
-                if (i, j, k, l) in optimizer.X and optimizer.X[(i, j, k, l)].X > 0:
-                    arrival_time = optimizer.source_df[optimizer.source_df['id'] == k]['planned_end_of_loading'].values[0] + pd.to_timedelta(travel_time, unit='h')
-                    assert start_shift <= arrival_time <= end_shift
+                if optimizer.X[(i, j, k, l)].X > 0.5:
+                    arrival_day = sum(d * optimizer.ArrivalDayBinary[(l, d)].X for d in optimizer.days)
+                    arrival_time = optimizer.T[l].X + travel_time - 24 * (arrival_day - 1)
+                    assert start_shift - 1e-6 <= arrival_time <= end_shift + 1e-6
 
-def test_consignment_assignment(optimizer):
+def test_consignment_assignment(solved_optimizer):
     """
     Test that each consignment is assigned to exactly one truck.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
 
     if optimizer.model.status == GRB.Status.OPTIMAL:
         for k in optimizer.consignment_list:
-            assignment_sum = sum(optimizer.X[(i, j, k, l)].X for (i, j) in optimizer.routes_list for l in optimizer.trucks if (i, j, k) in optimizer.valid_combinations)
-            assert assignment_sum == 0.0
+            assignment_sum = optimizer.X.sum('*', '*', k, '*').getValue()
+            assert assignment_sum == pytest.approx(1)
 
-def test_flow_conservation(optimizer):
+def test_flow_conservation(solved_optimizer):
     """
-    Test that if a truck leaves a source, it must go to one destination.
+    Test that a truck only leaves a source if it is used.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
 
     if optimizer.model.status == GRB.Status.OPTIMAL:
         for l in optimizer.trucks:
             for i in optimizer.source_list:
-                outflow_sum = sum(optimizer.X[(i, j, k, l)].X for j in optimizer.destination_list if j != i for k in optimizer.consignment_list if (i, j, k) in optimizer.valid_combinations)
-                assert outflow_sum <= optimizer.Z[l].X
+                outflow_sum = optimizer.X.sum(i, '*', '*', l).getValue()
+                assert outflow_sum <= 2 * optimizer.Z[l].X + 1e-6
 
-def test_sorting_capacity_constraint(optimizer):
+def test_sorting_capacity_constraint(solved_optimizer):
     """
     Test the sorting capacity constraint of each PZE.
     """
-    optimizer.add_constraints()
-    optimizer.solve()
+    optimizer = solved_optimizer
 
     if optimizer.model.status == GRB.Status.OPTIMAL:
         for j in optimizer.destination_list:
-            working_hours = optimizer.destination_df[optimizer.destination_df['Destination_ID'] == j]['End of lay-on'].values[0] - optimizer.destination_df[optimizer.destination_df['Destination_ID'] == j]['Start of shift'].values[0]
-            incoming_quantity = sum(optimizer.X[(i, j, k, l)].X * optimizer.source_df[optimizer.source_df['id'] == k]['Consignment quantity'].values[0] for i in optimizer.source_list if j != i for k in optimizer.consignment_list for l in optimizer.trucks if (i, j, k) in optimizer.valid_combinations)
-            sorting_capacity = working_hours * optimizer.destination_df[optimizer.destination_df['Destination_ID'] == j]['Sorting capacity'].values[0]
+            working_hours = optimizer._dest_by_id.loc[j, 'End of lay-on'] - optimizer._dest_by_id.loc[j, 'Start of shift']
+            incoming_quantity = sum(optimizer.X[(i, j, k, l)].X * optimizer._source_by_id.loc[k, 'Consignment quantity'] for (i, jj, k) in optimizer.valid_combinations if jj == j for l in optimizer.trucks)
+            sorting_capacity = working_hours * optimizer._dest_by_id.loc[j, 'Sorting capacity']
             assert incoming_quantity <= sorting_capacity
 
-def test_solve_function(optimizer):
+def test_solve_function(solved_optimizer):
     """
     Test the solve function for optimal solution status.
     """
+    optimizer = solved_optimizer
+    assert optimizer.model.status == GRB.OPTIMAL
+
+def test_solution_assigns_consignments(solved_optimizer):
+    """
+    Test that the dummy data gives a non-empty model whose optimum spreads the consignments over two days.
+    """
+    optimizer = solved_optimizer
+    assert len(optimizer.X) > 0
+    assert optimizer.model.status == GRB.OPTIMAL
+    # 70 from PZA1 and 50 from PZA2 exceed the daily capacity of 90, so one of the two trucks arrives on day 2
+    assert optimizer.model.ObjVal == pytest.approx(3)
+
+def test_daily_sorting_capacity(solved_optimizer):
+    """
+    Test that the lazy sorting capacity constraints hold for every destination and day.
+    """
+    optimizer = solved_optimizer
+    for j in optimizer.destination_list:
+        for d in optimizer.days:
+            incoming_quantity = sum(
+                optimizer.qty_by_k[k] * x.X * optimizer.ArrivalDayBinary[(l, d)].X
+                for (i, jj, k, l), x in optimizer.X.items() if jj == j
+            )
+            assert incoming_quantity <= optimizer.sorting_capacity_by_j[j] + 1e-6
+
+def test_earliest_arrival_day(optimizer):
+    """
+    Test the earliest feasible arrival day, including a shift that ends after midnight.
+    """
+    assert optimizer._dest_by_id.loc['PZE2', 'Start of shift'] == 22
+    assert optimizer._dest_by_id.loc['PZE2', 'End of lay-on'] == 30
+    assert optimizer.earliest_arrival_day('PZA1', 'PZE1', 8) == 1
+    # Released at 23:00, the truck reaches PZE1 at midnight, after its 19:00 end of lay-on
+    assert optimizer.earliest_arrival_day('PZA1', 'PZE1', 23) == 2
+    # PZE2 sorts until 06:00 the next morning, so arriving at 01:00 is still day 1
+    assert optimizer.earliest_arrival_day('PZA1', 'PZE2', 23) == 1
+    assert list(optimizer.days) == [1, 2, 3, 4, 5, 6]
+
+def test_warm_start_is_feasible(optimizer):
+    """
+    Test that the greedy start assigns every consignment and satisfies the constraints of the model,
+    including the lazy sorting capacity rows.
+    """
     optimizer.add_constraints()
-    optimizer.solve()
+    optimizer.set_warm_start()
+    optimizer.model.update()
+    assert optimizer.X[('PZA1', 'PZE1', 7791592, 0)].Start == 1
+    assert optimizer.X[('PZA1', 'PZE1', 7791596, 0)].Start == 1
+    assert optimizer.X[('PZA2', 'PZE1', 7791601, 1)].Start == 1
+    assert all(x.Start < GRB.UNDEFINED for x in optimizer.X.values())
+    # 70 from PZA1 arrive on day 1, so PZA2's 50 would exceed the daily capacity of 90 and move to day 2
+    assert optimizer.ArrivalDayBinary[(0, 1)].Start == 1
+    assert optimizer.ArrivalDayBinary[(1, 1)].Start == 0
+    assert optimizer.ArrivalDayBinary[(1, 2)].Start == 1
+    for d in optimizer.days:
+        incoming_quantity = sum(
+            optimizer.qty_by_k[k] * x.Start * optimizer.ArrivalDayBinary[(l, d)].Start
+            for (i, j, k, l), x in optimizer.X.items() if j == 'PZE1' and optimizer.Z[l].Start == 1
+        )
+        assert incoming_quantity <= optimizer.sorting_capacity_by_j['PZE1']
+
+    # Fix every variable with a start value; the remaining model, lazy capacity rows included, must still be feasible
+    variables = optimizer.model.getVars()
+    for var, start in zip(variables, optimizer.model.getAttr('Start', variables)):
+        if start < GRB.UNDEFINED:
+            var.LB = start
+            var.UB = start
+    optimizer.model.setParam('OutputFlag', 0)
+    optimizer.model.optimize()
     assert optimizer.model.status == GRB.OPTIMAL
+
+def test_warm_start_is_partial_when_fleet_is_short():
+    """
+    Test that consignments the greedy cannot place are left undefined for Gurobi to complete.
+    """
+    optimizer = build_optimizer(fleet_size=1)
+    optimizer.add_constraints()
+    optimizer.set_warm_start()
+    optimizer.model.update()
+    assert optimizer.X[('PZA1', 'PZE1', 7791592, 0)].Start == 1
+    assert optimizer.X[('PZA1', 'PZE1', 7791596, 0)].Start == 1
+    assert optimizer.X[('PZA2', 'PZE1', 7791601, 0)].Start == GRB.UNDEFINED
+    assert optimizer.Z[0].Start == 1
+
+def test_sorting_capacity_lazy_rows(optimizer):
+    """
+    Test that there is one lazy sorting capacity row per destination and day, summing the quantities arriving that day.
+    """
+    optimizer.add_constraints()
+    optimizer.model.update()
+    assert optimizer.sorting_capacity_by_j['PZE1'] == pytest.approx(90)
+    for d in optimizer.days:
+        constr = optimizer.model.getConstrByName(f"SortingCapacity[PZE1,{d}]")
+        assert constr.Lazy == 1
+        assert constr.RHS == pytest.approx(90)
+        row = optimizer.model.getRow(constr)
+        coefficients = {row.getVar(n).VarName: row.getCoeff(n) for n in range(row.size())}
+        expected = {
+            optimizer.W[key].VarName: optimizer.W_quantity[key]
+            for key in optimizer.W.keys() if key[1] == 'PZE1' and key[4] == d
+        }
+        assert coefficients == pytest.approx(expected)